@@ -8,14 +8,17 @@ import time
 from pathlib import Path
 
 import yaml
-import schedule
 
-from rss_reader.fetcher import fetch_all_feeds, filter_by_age
+from rss_reader.fetcher import dedupe_articles, fetch_all_feeds, filter_by_age
 from rss_reader.storage import Storage
 from rss_reader.summarizer import Summarizer
 from rss_reader.notifier import Notifier
 
 
+# 配置文件中的环境变量占位符 ${VAR_NAME}
+_ENV_RE = re.compile(r'\$\{(\w+)\}')
+
+
 def load_config(config_path: str = "config.yaml") -> dict:
     """
     加载配置文件，支持环境变量替换
@@ -25,12 +28,13 @@ def load_config(config_path: str = "config.yaml") -> dict:
     with open(config_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    # 替换环境变量 ${VAR_NAME}
-    def replace_env(match):
-        var_name = match.group(1)
-        return os.environ.get(var_name, '')
+    # 替换环境变量 ${VAR_NAME}（没有占位符时跳过正则替换）
+    if '${' in content:
+        def replace_env(match):
+            var_name = match.group(1)
+            return os.environ.get(var_name, '')
 
-    content = re.sub(r'\$\{(\w+)\}', replace_env, content)
+        content = _ENV_RE.sub(replace_env, content)
 
     return yaml.safe_load(content)
 
@@ -48,9 +52,18 @@ def run_once(config: dict, storage: Storage):
         print("[警告] 没有配置任何 feeds")
         return
 
-    all_articles = fetch_all_feeds(feeds)
+    schedule_config = config.get('schedule', {})
+    all_articles = fetch_all_feeds(
+        feeds,
+        max_connections=schedule_config.get('fetch_concurrency', 32),
+        entry_cap=schedule_config.get('max_entries_per_feed', 50)
+    )
     print(f"共获取 {len(all_articles)} 篇文章")
 
+    # 去除跨 feed 重复的文章，减少后续数据库查询和 LLM 调用
+    all_articles = dedupe_articles(all_articles)
+    print(f"去重后: {len(all_articles)} 篇")
+
     # 2. 按时间过滤（只处理最近N小时的文章）
     max_age_hours = config.get('schedule', {}).get('max_age_hours', 24)
     recent_articles = filter_by_age(all_articles, max_age_hours)
@@ -84,30 +97,33 @@ def run_once(config: dict, storage: Storage):
 
     # 7. 处理每篇文章
     success_count = 0
-    for i, article in enumerate(articles_to_process, 1):
-        print(f"\n--- 文章 {i}/{len(articles_to_process)} ---")
-        print(f"标题: {article.title[:60]}...")
-        print(f"来源: {article.feed_name}")
-
-        # 生成摘要
-        summary = summarizer.summarize(article)
-        if summary:
-            print(f"摘要: {summary[:100]}...")
-
-            # 推送通知
-            if notifier.has_notifiers:
-                results = notifier.notify(article, summary)
-                for channel, ok in results.items():
-                    status = "✅" if ok else "❌"
-                    print(f"  {status} {channel}")
-
-            # 标记为已处理
-            storage.mark_processed(article, summary)
-            success_count += 1
-        else:
-            print("[跳过] 摘要生成失败")
-            # 即使摘要失败也标记为已处理，避免重复尝试
-            storage.mark_processed(article, None)
+    try:
+        for i, article in enumerate(articles_to_process, 1):
+            print(f"\n--- 文章 {i}/{len(articles_to_process)} ---")
+            print(f"标题: {article.title[:60]}...")
+            print(f"来源: {article.feed_name}")
+
+            # 生成摘要
+            summary = summarizer.summarize(article)
+            if summary:
+                print(f"摘要: {summary[:100]}...")
+
+                # 推送通知
+                if notifier.has_notifiers:
+                    results = notifier.notify(article, summary)
+                    for channel, ok in results.items():
+                        status = "✅" if ok else "❌"
+                        print(f"  {status} {channel}")
+
+                # 标记为已处理（推送后立即写入，避免进程被终止后重复推送）
+                storage.mark_processed(article, summary)
+                success_count += 1
+            else:
+                print("[跳过] 摘要生成失败")
+                # 即使摘要失败也标记为已处理，避免重复尝试
+                storage.mark_processed(article, None)
+    finally:
+        notifier.close()
 
     # 8. 打印统计
     print("\n" + "=" * 50)
@@ -119,6 +135,8 @@ def run_once(config: dict, storage: Storage):
 
 def run_scheduler(config: dict, storage: Storage):
     """运行定时调度"""
+    import schedule
+
     interval = config.get('schedule', {}).get('interval_minutes', 60)
 
     print(f"⏰ 启动定时任务，每 {interval} 分钟执行一次")
@@ -132,7 +150,11 @@ def run_scheduler(config: dict, storage: Storage):
 
     while True:
         schedule.run_pending()
-        time.sleep(1)
+        # 睡到下一个任务到期，而不是每秒轮询；最长 60 秒以便及时响应 Ctrl+C
+        idle = schedule.idle_seconds()
+        if idle is None:
+            break
+        time.sleep(max(1, min(idle, 60)))
 
 
 def main():
@@ -187,19 +209,19 @@ def main():
     # 初始化存储
     storage = Storage(args.db)
 
-    # 显示统计信息
-    if args.stats:
-        stats = storage.get_stats()
-        print("\n📊 RSS Reader 统计")
-        print("=" * 40)
-        print(f"总文章数: {stats['total_articles']}")
-        print("\n按来源统计:")
-        for feed, count in stats['by_feed'].items():
-            print(f"  - {feed}: {count}")
-        return 0
-
-    # 执行
     try:
+        # 显示统计信息
+        if args.stats:
+            stats = storage.get_stats()
+            print("\n📊 RSS Reader 统计")
+            print("=" * 40)
+            print(f"总文章数: {stats['total_articles']}")
+            print("\n按来源统计:")
+            for feed, count in stats['by_feed'].items():
+                print(f"  - {feed}: {count}")
+            return 0
+
+        # 执行
         if args.once:
             run_once(config, storage)
         else:
@@ -207,6 +229,8 @@ def main():
     except KeyboardInterrupt:
         print("\n\n👋 已停止")
         return 0
+    finally:
+        storage.close()
 
     return 0
 
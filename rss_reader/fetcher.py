@@ -1,18 +1,35 @@
 """RSS Feed 抓取模块"""
 
 import feedparser
+import functools
+import hashlib
 import html
+import io
 import json
+import os
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
-from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from datetime import datetime, timedelta
+
+if TYPE_CHECKING:
+    import asyncio
+
+    import aiohttp
 
 
 # HTTP 缓存文件路径
 CACHE_FILE = Path("feed_cache.json")
 
+# HTML 清理用的预编译正则
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def hash_url(url: str) -> str:
+    """生成 URL 的哈希值用于去重（非加密用途，BLAKE2b-64 足够）"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+
 
 @dataclass
 class Article:
@@ -23,38 +40,77 @@ class Article:
     published: Optional[datetime]
     feed_name: str
     category: str
+    url_hash: str = field(init=False)
+
+    def __post_init__(self):
+        # 创建时计算一次，避免每次访问重复哈希
+        self.url_hash = hash_url(self.url)
 
-    @property
-    def url_hash(self) -> str:
-        """生成 URL 的哈希值用于去重"""
-        import hashlib
-        return hashlib.sha256(self.url.encode()).hexdigest()[:16]
 
+def load_cache() -> tuple[dict, Optional[bytes]]:
+    """
+    加载 HTTP 缓存（ETag/Last-Modified）
 
-def load_cache() -> dict:
-    """加载 HTTP 缓存（ETag/Last-Modified）"""
+    Returns:
+        (缓存字典, 文件内容摘要)，摘要用于判断保存时是否有变化
+    """
     if CACHE_FILE.exists():
         try:
-            return json.loads(CACHE_FILE.read_text())
+            raw = CACHE_FILE.read_bytes()
+            return json.loads(raw), hashlib.md5(raw).digest()
         except (json.JSONDecodeError, IOError):
             pass
-    return {}
+    return {}, None
+
+
+def save_cache(cache: dict, old_digest: Optional[bytes] = None):
+    """保存 HTTP 缓存（内容未变化时跳过写入）"""
+    raw = json.dumps(cache, separators=(',', ':')).encode()
+    if hashlib.md5(raw).digest() == old_digest:
+        return
 
+    # 先写临时文件再替换，避免写入中断导致缓存损坏
+    tmp_file = CACHE_FILE.with_name(CACHE_FILE.name + '.tmp')
+    tmp_file.write_bytes(raw)
+    os.replace(tmp_file, CACHE_FILE)
 
-def save_cache(cache: dict):
-    """保存 HTTP 缓存"""
-    CACHE_FILE.write_text(json.dumps(cache, indent=2))
+
+def _collapse_whitespace(text: str) -> str:
+    """合并连续空白并去除首尾空白（split/join 一次完成，比正则替换快）"""
+    return ' '.join(text.split())
+
+
+@functools.lru_cache(maxsize=None)
+def _html_parser_class():
+    """按需加载 selectolax 解析器（只尝试一次），未安装时返回 None"""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:  # 未安装 selectolax 时退回正则清理
+        return None
+    return LexborHTMLParser
+
+
+def _clean_html_regex(raw_html: str) -> str:
+    """用正则清理 HTML 标签（selectolax 不可用时的后备方案）"""
+    # 移除 HTML 标签 -> 解码 HTML 实体 -> 清理多余空白
+    return _collapse_whitespace(html.unescape(_TAG_RE.sub('', raw_html)))
 
 
 def clean_html(raw_html: str) -> str:
-    """清理 HTML 标签，保留纯文本"""
-    # 移除 HTML 标签
-    text = re.sub(r'<[^>]+>', '', raw_html)
-    # 解码 HTML 实体
-    text = html.unescape(text)
-    # 清理多余空白
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    """清理 HTML 标签，保留纯文本（丢弃 script/style 内容）"""
+    parser_class = _html_parser_class()
+    if parser_class is None:
+        return _clean_html_regex(raw_html)
+
+    try:
+        tree = parser_class(raw_html)
+        for tag in tree.css('script,style'):
+            tag.decompose()
+        text = tree.text(separator=' ') or ''
+    except Exception:
+        return _clean_html_regex(raw_html)
+
+    return _collapse_whitespace(text)
 
 
 def parse_published_date(entry) -> Optional[datetime]:
@@ -72,115 +128,241 @@ def parse_published_date(entry) -> Optional[datetime]:
     return None
 
 
-def fetch_feed(feed_config: dict, cache: dict) -> list[Article]:
+def _parse_feed(
+    body: bytes,
+    headers: dict,
+    name: str,
+    category: str,
+    entry_cap: int
+) -> list[Article]:
+    """
+    解析已下载的 feed 内容（纯 CPU 操作）
+
+    Args:
+        body: 响应体
+        headers: 响应头（键为小写，供 feedparser 判断编码）
+        name: feed 名称
+        category: feed 分类
+        entry_cap: 最多保留的条目数（按发布时间取最新）
+
+    Returns:
+        文章列表
+    """
+    articles = []
+
+    # 必须包装成文件对象：feedparser 会把 bytes/str 参数当作本地路径尝试打开
+    feed = feedparser.parse(io.BytesIO(body), response_headers=headers)
+
+    if feed.bozo and not feed.entries:
+        print(f"[警告] Feed 解析错误 ({name}): {feed.bozo_exception}")
+        return articles
+
+    # 提取链接和发布时间
+    entries = []
+    for entry in feed.entries:
+        link = entry.get('link', '')
+        if not link:
+            continue
+        entries.append((link, parse_published_date(entry), entry))
+
+    # 只处理最新的 entry_cap 条，避免为大 feed 中会被丢弃的条目清理 HTML
+    entries.sort(key=lambda item: item[1] or datetime.min, reverse=True)
+
+    for link, published, entry in entries[:entry_cap]:
+        # 提取标题
+        title = entry.get('title', '无标题')
+
+        # 提取内容（优先级：content > summary > description）
+        content = ''
+        if hasattr(entry, 'content') and entry.content:
+            content = entry.content[0].get('value', '')
+        elif hasattr(entry, 'summary'):
+            content = entry.summary
+        elif hasattr(entry, 'description'):
+            content = entry.description
+
+        # 清理 HTML
+        content = clean_html(content)
+
+        # 限制内容长度（避免 LLM token 过多）
+        if len(content) > 3000:
+            content = content[:3000] + '...'
+
+        article = Article(
+            title=title,
+            url=link,
+            content=content,
+            published=published,
+            feed_name=name,
+            category=category
+        )
+        articles.append(article)
+
+    return articles
+
+
+async def _fetch_one(
+    session: 'aiohttp.ClientSession',
+    semaphore: 'asyncio.Semaphore',
+    timeout: 'aiohttp.ClientTimeout',
+    feed_config: dict,
+    cache: dict,
+    entry_cap: int
+) -> list[Article]:
     """
     抓取单个 RSS feed（支持 HTTP 条件请求）
 
     Args:
+        session: aiohttp 会话
+        semaphore: 限制并发连接数的信号量
+        timeout: 单个请求的超时（拿到并发名额后才开始计时）
         feed_config: 包含 name, url, category 的字典
         cache: HTTP 缓存字典（存储 etag/modified）
+        entry_cap: 每个 feed 最多解析的条目数
 
     Returns:
         文章列表
     """
+    import asyncio
+
     name = feed_config['name']
     url = feed_config['url']
     category = feed_config.get('category', 'general')
 
-    articles = []
+    # 使用缓存的 ETag 和 Last-Modified 发起条件请求
+    feed_cache = dict(cache.get(url, {}))
+    headers = {}
+    if feed_cache.get('etag'):
+        headers['If-None-Match'] = feed_cache['etag']
+    if feed_cache.get('modified'):
+        headers['If-Modified-Since'] = feed_cache['modified']
 
-    # 获取缓存的 ETag 和 Last-Modified
-    feed_cache = cache.get(url, {})
-    etag = feed_cache.get('etag')
-    modified = feed_cache.get('modified')
+    print(f"[抓取] {name}...")
 
     try:
-        # 使用条件请求，如果内容未变化服务器返回 304
-        feed = feedparser.parse(url, etag=etag, modified=modified)
-
-        # 304 Not Modified - feed 没有更新
-        if hasattr(feed, 'status') and feed.status == 304:
-            print(f"  [跳过] {name} 无更新 (304)")
-            return articles
-
-        # 更新缓存
-        if hasattr(feed, 'etag') and feed.etag:
-            feed_cache['etag'] = feed.etag
-        if hasattr(feed, 'modified') and feed.modified:
-            feed_cache['modified'] = feed.modified
+        async with semaphore:
+            async with session.get(
+                url, headers=headers, timeout=timeout
+            ) as response:
+                # 304 Not Modified - feed 没有更新
+                if response.status == 304:
+                    print(f"  [跳过] {name} 无更新 (304)")
+                    return []
+
+                if response.status >= 400:
+                    print(f"[错误] 抓取 {name} 失败: HTTP {response.status}")
+                    return []
+
+                body = await response.read()
+                response_headers = {
+                    k.lower(): v for k, v in response.headers.items()
+                }
+                # feedparser 以 content-location 作为 base URI 解析相对链接；
+                # 用最终 URL（跟随重定向后）兜底
+                response_headers.setdefault(
+                    'content-location', str(response.url)
+                )
+
+        # 更新缓存（所有协程在同一事件循环中运行，无需加锁）
+        if response_headers.get('etag'):
+            feed_cache['etag'] = response_headers['etag']
+        if response_headers.get('last-modified'):
+            feed_cache['modified'] = response_headers['last-modified']
         cache[url] = feed_cache
 
-        if feed.bozo and not feed.entries:
-            print(f"[警告] Feed 解析错误 ({name}): {feed.bozo_exception}")
-            return articles
-
-        for entry in feed.entries:
-            # 提取标题
-            title = entry.get('title', '无标题')
-
-            # 提取链接
-            link = entry.get('link', '')
-            if not link:
-                continue
-
-            # 提取内容（优先级：content > summary > description）
-            content = ''
-            if hasattr(entry, 'content') and entry.content:
-                content = entry.content[0].get('value', '')
-            elif hasattr(entry, 'summary'):
-                content = entry.summary
-            elif hasattr(entry, 'description'):
-                content = entry.description
-
-            # 清理 HTML
-            content = clean_html(content)
-
-            # 限制内容长度（避免 LLM token 过多）
-            if len(content) > 3000:
-                content = content[:3000] + '...'
-
-            article = Article(
-                title=title,
-                url=link,
-                content=content,
-                published=parse_published_date(entry),
-                feed_name=name,
-                category=category
-            )
-            articles.append(article)
+        # 解析是 CPU 操作，放到线程池中避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        articles = await loop.run_in_executor(
+            None, _parse_feed,
+            body, response_headers, name, category, entry_cap
+        )
 
+    except asyncio.TimeoutError:
+        print(f"[错误] 抓取 {name} 失败: 请求超时")
+        return []
     except Exception as e:
-        print(f"[错误] 抓取 {name} 失败: {e}")
+        print(f"[错误] 抓取 {name} 失败: {str(e) or repr(e)}")
+        return []
 
+    if articles:
+        print(f"  -> {name}: 获取 {len(articles)} 篇文章")
     return articles
 
 
-def fetch_all_feeds(feeds_config: list[dict]) -> list[Article]:
+async def _fetch_all(
+    feeds_config: list[dict],
+    cache: dict,
+    max_connections: int,
+    entry_cap: int
+) -> list[list[Article]]:
+    """并发发起所有 feed 的 HTTP 请求"""
+    import asyncio
+
+    import aiohttp
+
+    # 用信号量限制并发，超时只计算请求本身，不含排队等待的时间
+    semaphore = asyncio.Semaphore(max(1, max_connections))
+    timeout = aiohttp.ClientTimeout(total=15)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers={'User-Agent': feedparser.USER_AGENT}
+    ) as session:
+        return await asyncio.gather(*[
+            _fetch_one(
+                session, semaphore, timeout, feed_config, cache, entry_cap
+            )
+            for feed_config in feeds_config
+        ])
+
+
+def fetch_all_feeds(
+    feeds_config: list[dict],
+    max_connections: int = 32,
+    entry_cap: int = 50
+) -> list[Article]:
     """
-    抓取所有配置的 feeds（带 HTTP 缓存）
+    并发抓取所有配置的 feeds（带 HTTP 缓存）
 
     Args:
         feeds_config: feed 配置列表
+        max_connections: 最大并发连接数
+        entry_cap: 每个 feed 最多解析的条目数（按发布时间取最新）
 
     Returns:
         所有文章的列表
     """
-    all_articles = []
-    cache = load_cache()
+    import asyncio
+
+    cache, cache_digest = load_cache()
 
-    for feed_config in feeds_config:
-        print(f"[抓取] {feed_config['name']}...")
-        articles = fetch_feed(feed_config, cache)
-        all_articles.extend(articles)
-        if articles:
-            print(f"  -> 获取 {len(articles)} 篇文章")
+    results = asyncio.run(
+        _fetch_all(feeds_config, cache, max_connections, entry_cap)
+    )
+    all_articles = [article for articles in results for article in articles]
 
     # 保存更新后的缓存
-    save_cache(cache)
+    save_cache(cache, cache_digest)
 
     return all_articles
 
 
+def dedupe_articles(articles: list[Article]) -> list[Article]:
+    """
+    按 URL 去重（同一文章可能出现在多个 feed 中），保留首次出现的文章
+
+    Args:
+        articles: 文章列表
+
+    Returns:
+        去重后的文章列表
+    """
+    unique = {}
+    for article in articles:
+        unique.setdefault(article.url_hash, article)
+    return list(unique.values())
+
+
 def filter_by_age(articles: list[Article], max_age_hours: int) -> list[Article]:
     """
     过滤出指定时间内的文章
@@ -192,17 +374,10 @@ def filter_by_age(articles: list[Article], max_age_hours: int) -> list[Article]:
     Returns:
         过滤后的文章列表
     """
-    from datetime import timedelta
-
-    now = datetime.now()
-    cutoff = now - timedelta(hours=max_age_hours)
-
-    filtered = []
-    for article in articles:
-        # 如果没有发布时间，保守处理：包含它
-        if article.published is None:
-            filtered.append(article)
-        elif article.published >= cutoff:
-            filtered.append(article)
+    cutoff = datetime.now() - timedelta(hours=max_age_hours)
 
-    return filtered
+    # 如果没有发布时间，保守处理：包含它
+    return [
+        a for a in articles
+        if a.published is None or a.published >= cutoff
+    ]
@@ -1,21 +1,26 @@
 """推送模块 - 飞书/Telegram/Email"""
 
 import json
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-import requests
-
 from .fetcher import Article
 
 
+# Telegram Markdown 特殊字符转义表（单次 translate 完成全部替换）
+_MD_ESCAPE_MAP = str.maketrans({c: '\\' + c for c in '_*[]()~`>#+-=|{}.!'})
+
+
 class FeishuNotifier:
     """飞书 Webhook 推送"""
 
     def __init__(self, webhook_url: str):
+        import requests
+
         self.webhook_url = webhook_url
+        # 复用连接（keep-alive），避免每条消息都重新握手
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
 
     def send(self, article: Article, summary: str) -> bool:
         """
@@ -78,10 +83,9 @@ class FeishuNotifier:
         }
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url,
                 json=content,
-                headers={"Content-Type": "application/json"},
                 timeout=10
             )
 
@@ -99,14 +103,22 @@ class FeishuNotifier:
             print(f"[飞书] 发送异常: {e}")
             return False
 
+    def close(self):
+        """关闭 HTTP 会话"""
+        self.session.close()
+
 
 class TelegramNotifier:
     """Telegram Bot 推送"""
 
     def __init__(self, bot_token: str, chat_id: str):
+        import requests
+
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.api_base = f"https://api.telegram.org/bot{bot_token}"
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
 
     def send(self, article: Article, summary: str) -> bool:
         """发送消息到 Telegram"""
@@ -122,7 +134,7 @@ class TelegramNotifier:
 _分类: {article.category}_"""
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_base}/sendMessage",
                 json={
                     "chat_id": self.chat_id,
@@ -143,13 +155,14 @@ _分类: {article.category}_"""
             print(f"[Telegram] 发送异常: {e}")
             return False
 
+    def close(self):
+        """关闭 HTTP 会话"""
+        self.session.close()
+
     @staticmethod
     def _escape_markdown(text: str) -> str:
         """转义 Markdown 特殊字符"""
-        chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in chars:
-            text = text.replace(char, f'\\{char}')
-        return text
+        return text.translate(_MD_ESCAPE_MAP)
 
 
 class EmailNotifier:
@@ -171,6 +184,10 @@ class EmailNotifier:
 
     def send(self, article: Article, summary: str) -> bool:
         """发送邮件"""
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         # 构建 HTML 邮件
         html_content = f"""
         <html>
@@ -200,7 +217,9 @@ class EmailNotifier:
         msg.attach(MIMEText(html_content, 'html', 'utf-8'))
 
         try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
+            with smtplib.SMTP(
+                self.smtp_host, self.smtp_port, timeout=10
+            ) as server:
                 server.starttls()
                 server.login(self.username, self.password)
                 server.send_message(msg)
@@ -247,6 +266,9 @@ class Notifier:
                 ))
             )
 
+        # 各渠道独立发送，用线程池并发推送
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.notifiers)))
+
     def notify(self, article: Article, summary: str) -> dict[str, bool]:
         """
         通过所有启用的渠道发送通知
@@ -256,12 +278,34 @@ class Notifier:
         """
         results = {}
 
-        for name, notifier in self.notifiers:
+        futures = {
+            name: self._pool.submit(notifier.send, article, summary)
+            for name, notifier in self.notifiers
+        }
+
+        # 各渠道自身设置了网络超时，这里等待实际结果
+        for name, future in futures.items():
             print(f"[推送] {name}: {article.title[:30]}...")
-            results[name] = notifier.send(article, summary)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"[推送] {name} 发送异常: {e}")
+                results[name] = False
 
         return results
 
+    def close(self):
+        """关闭推送线程池和各渠道的连接"""
+        # 等待进行中的发送结束后再关闭会话
+        self._pool.shutdown(wait=True)
+        for _, notifier in self.notifiers:
+            if hasattr(notifier, 'close'):
+                notifier.close()
+
+    def __del__(self):
+        if hasattr(self, '_pool'):
+            self.close()
+
     @property
     def has_notifiers(self) -> bool:
         """是否有可用的通知渠道"""
@@ -1,11 +1,20 @@
 """SQLite 存储模块 - 用于去重"""
 
 import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
-from .fetcher import Article
+from .fetcher import Article, hash_url
+
+
+# SQLite 单条语句的参数上限约 999，批量查询按此分块
+_SQL_CHUNK = 500
+
+# 数据库结构版本（PRAGMA user_version）
+# 1: url_hash 由 SHA-256 前缀改为 BLAKE2b-64
+_SCHEMA_VERSION = 1
 
 
 class Storage:
@@ -13,11 +22,17 @@ class Storage:
 
     def __init__(self, db_path: str = "rss_reader.db"):
         self.db_path = Path(db_path)
+        # 整个生命周期复用同一连接，避免每次操作重复打开数据库
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 连接可能被多个线程共享，所有访问都需持锁
+        self._lock = threading.Lock()
         self._init_db()
 
     def _init_db(self):
         """初始化数据库表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS processed_articles (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,12 +48,34 @@ class Storage:
                 CREATE INDEX IF NOT EXISTS idx_url_hash
                 ON processed_articles(url_hash)
             """)
-            conn.commit()
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_feed_name
+                ON processed_articles(feed_name)
+            """)
+
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                # 旧记录的 url_hash 是 SHA-256 前缀，按 url 重新计算
+                rows = conn.execute(
+                    "SELECT id, url FROM processed_articles"
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE processed_articles SET url_hash = ? WHERE id = ?",
+                    [(hash_url(url), row_id) for row_id, url in rows]
+                )
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+            # 首次运行时生成一次统计信息，之后不再重复扫描全表
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if not has_stats:
+                conn.execute("ANALYZE")
 
     def is_processed(self, article: Article) -> bool:
         """检查文章是否已处理过"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
+        with self._lock:
+            cursor = self._conn.execute(
                 "SELECT 1 FROM processed_articles WHERE url_hash = ?",
                 (article.url_hash,)
             )
@@ -50,30 +87,59 @@ class Storage:
         summary: Optional[str] = None
     ):
         """标记文章为已处理"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO processed_articles
+        self.mark_processed_many([(article, summary)])
+
+    def mark_processed_many(
+        self,
+        items: list[tuple[Article, Optional[str]]]
+    ):
+        """批量标记文章为已处理（单个事务）"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn as conn:
+            # 已存在的记录原地更新，避免 INSERT OR REPLACE 的删除+重插
+            conn.executemany("""
+                INSERT INTO processed_articles
                 (url_hash, url, title, feed_name, summary, processed_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                article.url_hash,
-                article.url,
-                article.title,
-                article.feed_name,
-                summary,
-                datetime.now().isoformat()
-            ))
-            conn.commit()
+                ON CONFLICT(url_hash) DO UPDATE SET
+                    summary = excluded.summary,
+                    processed_at = excluded.processed_at
+            """, [
+                (
+                    article.url_hash,
+                    article.url,
+                    article.title,
+                    article.feed_name,
+                    summary,
+                    now
+                )
+                for article, summary in items
+            ])
 
     def filter_new_articles(self, articles: list[Article]) -> list[Article]:
-        """过滤出未处理的新文章"""
-        return [a for a in articles if not self.is_processed(a)]
+        """过滤出未处理的新文章（按块批量查询）"""
+        hashes = [a.url_hash for a in articles]
+        seen = set()
+
+        with self._lock:
+            for i in range(0, len(hashes), _SQL_CHUNK):
+                chunk = hashes[i:i + _SQL_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = self._conn.execute(
+                    f"SELECT url_hash FROM processed_articles "
+                    f"WHERE url_hash IN ({placeholders})",
+                    chunk
+                )
+                seen.update(row[0] for row in cursor)
+
+        return [a for a in articles if a.url_hash not in seen]
 
     def get_recent_articles(self, limit: int = 50) -> list[dict]:
         """获取最近处理的文章"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute("""
                 SELECT url_hash, url, title, feed_name, summary, processed_at
                 FROM processed_articles
                 ORDER BY processed_at DESC
@@ -83,13 +149,13 @@ class Storage:
 
     def get_stats(self) -> dict:
         """获取统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
+        with self._lock:
+            cursor = self._conn.execute(
                 "SELECT COUNT(*) FROM processed_articles"
             )
             total = cursor.fetchone()[0]
 
-            cursor = conn.execute("""
+            cursor = self._conn.execute("""
                 SELECT feed_name, COUNT(*) as count
                 FROM processed_articles
                 GROUP BY feed_name
@@ -101,3 +167,8 @@ class Storage:
                 'total_articles': total,
                 'by_feed': by_feed
             }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()